@@ -1,3 +1,4 @@
+import re
 import sqlite3
 from datetime import datetime
 from contextlib import contextmanager
@@ -5,8 +6,9 @@ from contextlib import contextmanager
 DATABASE_PATH = "../database.db"
 
 @contextmanager
-def get_db():
-    conn = sqlite3.connect(DATABASE_PATH)
+def get_db(check_same_thread=True):
+    # uri=True lets archive partitions be attached read-only
+    conn = sqlite3.connect(DATABASE_PATH, check_same_thread=check_same_thread, uri=True)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
@@ -16,6 +18,9 @@ def get_db():
 def init_db():
     """Initialize database tables"""
     with get_db() as conn:
+        # WAL lets history/export reads and archive rollover run alongside inserts
+        conn.execute("PRAGMA journal_mode=WAL")
+
         conn.execute("""
             CREATE TABLE IF NOT EXISTS predictions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -27,7 +32,10 @@ def init_db():
                 pest_type TEXT,
                 disease_type TEXT,
                 recommendation TEXT,
-                action_taken TEXT DEFAULT 'pending'
+                action_taken TEXT DEFAULT 'pending',
+                farmer_id INTEGER REFERENCES farmers(id),
+                latitude REAL,
+                longitude REAL
             )
         """)
         
@@ -37,37 +45,310 @@ def init_db():
                 name TEXT NOT NULL,
                 phone TEXT,
                 region TEXT,
-                created_at TEXT
+                created_at TEXT,
+                name_key TEXT
+            )
+        """)
+
+        # Every normalized name a farmer has been registered under, so history
+        # by name still finds them after a phone upsert renames the farmer
+        seed_aliases = conn.execute("""
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'farmer_aliases'
+        """).fetchone() is None
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS farmer_aliases (
+                name_key TEXT NOT NULL,
+                farmer_id INTEGER NOT NULL REFERENCES farmers(id),
+                PRIMARY KEY (name_key, farmer_id)
             )
         """)
+
+        # Databases created before the farmer registry/locations lack these columns
+        _add_missing_columns(conn, "predictions", {
+            "farmer_id": "INTEGER REFERENCES farmers(id)",
+            "latitude": "REAL",
+            "longitude": "REAL",
+        })
+        _add_missing_columns(conn, "farmers", {"name_key": "TEXT"})
+
+        # Supports range/filter scans used by bulk export
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_predictions_timestamp
+            ON predictions (timestamp)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_predictions_farmer
+            ON predictions (farmer_id, timestamp)
+        """)
+        conn.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_farmers_phone
+            ON farmers (phone) WHERE phone IS NOT NULL
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_farmers_name_key
+            ON farmers (name_key)
+        """)
+        if seed_aliases:
+            conn.executemany(
+                "INSERT OR IGNORE INTO farmer_aliases (name_key, farmer_id) VALUES (?, ?)",
+                [(normalize_name(row["name"]), row["id"])
+                 for row in conn.execute("SELECT id, name FROM farmers").fetchall()]
+            )
+        conn.commit()
+
+        _backfill_farmer_ids(conn, seed_aliases)
+
+def _add_missing_columns(conn, table, columns):
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, declaration in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {declaration}")
+
+def _backfill_farmer_ids(conn, seed_aliases=False):
+    """
+    Link predictions saved before the farmer registry to farmer rows,
+    in the hot table and in every archive partition
+    - Spellings that normalize to the same name share one phone-less farmer
+    - seed_aliases records the names already-linked predictions were saved
+      under, recovering spellings a phone upsert overwrote before aliases existed
+    """
+    from archive import list_archived_months, attach_partition
+
+    _backfill_table(conn, "main.predictions", seed_aliases)
+    for key in list_archived_months():
+        with attach_partition(conn, key, writable=True) as schema:
+            _backfill_table(conn, f"{schema}.predictions", seed_aliases)
+
+def _backfill_table(conn, table, seed_aliases=False):
+    names = [
+        row[0] for row in conn.execute(
+            f"SELECT DISTINCT farmer_name FROM {table} WHERE farmer_id IS NULL"
+        ).fetchall()
+    ]
+    for name in names:
+        farmer_id = _upsert_farmer(conn, name, None, None)
+        conn.execute(
+            f"UPDATE {table} SET farmer_id = ? WHERE farmer_id IS NULL AND farmer_name = ?",
+            (farmer_id, name)
+        )
+
+    if seed_aliases:
+        linked = conn.execute(
+            f"SELECT DISTINCT farmer_id, farmer_name FROM {table} WHERE farmer_id IS NOT NULL"
+        ).fetchall()
+        conn.executemany(
+            "INSERT OR IGNORE INTO main.farmer_aliases (name_key, farmer_id) VALUES (?, ?)",
+            [(normalize_name(name), farmer_id) for farmer_id, name in linked]
+        )
+    conn.commit()
+
+def normalize_phone(phone):
+    """Reduce a phone number to its 10 national digits (India), or None"""
+    digits = re.sub(r"\D", "", phone or "")
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits or None
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key for farmer names"""
+    return " ".join((name or "").split()).lower()
+
+def _upsert_farmer(conn, name, phone, region):
+    phone = normalize_phone(phone)
+    name_key = normalize_name(name)
+    now = datetime.now().isoformat()
+
+    if phone:
+        farmer_id = conn.execute("""
+            INSERT INTO farmers (name, phone, region, created_at, name_key)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (phone) WHERE phone IS NOT NULL DO UPDATE SET
+                name = excluded.name,
+                name_key = excluded.name_key,
+                region = COALESCE(excluded.region, farmers.region)
+            RETURNING id
+        """, (name, phone, region, now, name_key)).fetchone()[0]
+    else:
+        # Without a phone the normalized name is the only identity we have
+        row = conn.execute("""
+            SELECT id FROM farmers WHERE name_key = ? AND phone IS NULL
+            ORDER BY id LIMIT 1
+        """, (name_key,)).fetchone()
+        if row:
+            return row[0]
+
+        farmer_id = conn.execute("""
+            INSERT INTO farmers (name, phone, region, created_at, name_key)
+            VALUES (?, NULL, ?, ?, ?)
+        """, (name, region, now, name_key)).lastrowid
+
+    # The farmer row keeps the latest spelling; earlier ones stay findable here
+    conn.execute(
+        "INSERT OR IGNORE INTO farmer_aliases (name_key, farmer_id) VALUES (?, ?)",
+        (name_key, farmer_id)
+    )
+    return farmer_id
+
+def upsert_farmer(name, phone, region):
+    """Get or create the farmer keyed by normalized phone (or name if no phone)"""
+    with get_db() as conn:
+        farmer_id = _upsert_farmer(conn, name, phone, region)
         conn.commit()
+        return farmer_id
 
-def save_prediction(farmer_name, region, crop_type, health_score, pest_type, recommendation):
+def save_prediction(farmer_name, region, crop_type, health_score, pest_type, recommendation,
+                    farmer_id=None, latitude=None, longitude=None):
     """Save prediction to database"""
     with get_db() as conn:
         conn.execute("""
             INSERT INTO predictions 
-            (timestamp, farmer_name, region, crop_type, health_score, pest_type, recommendation)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            (timestamp, farmer_id, farmer_name, region, crop_type, health_score, pest_type,
+             recommendation, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             datetime.now().isoformat(),
+            farmer_id,
             farmer_name,
             region,
             crop_type,
             health_score,
             pest_type,
-            recommendation
+            recommendation,
+            latitude,
+            longitude
         ))
         conn.commit()
 
+HISTORY_LIMIT = 10
+
+def _recent_history(where, params, limit=HISTORY_LIMIT):
+    """
+    Most recent predictions matching where, newest first
+    - Reads the hot table, then archive partitions newest to oldest until
+      no older month can still make the cut
+    - Partitions are listed after the hot read and rows are de-duplicated by
+      id, so a row moved by a concurrent rollover is neither lost nor repeated
+    """
+    from archive import list_archived_months, attach_partition, next_month
+
+    query = """
+        SELECT * FROM {table}
+        WHERE {where}
+        ORDER BY timestamp DESC
+        LIMIT ?
+    """
+    with get_db() as conn:
+        rows = conn.execute(
+            query.format(table="main.predictions", where=where), (*params, limit)
+        ).fetchall()
+        history = [dict(row) for row in rows]
+        seen = {row["id"] for row in history}
+
+        for key in reversed(list_archived_months()):
+            if len(history) >= limit and history[limit - 1]["timestamp"] >= next_month(key):
+                break
+            with attach_partition(conn, key) as schema:
+                rows = conn.execute(
+                    query.format(table=f"{schema}.predictions", where=where), (*params, limit)
+                ).fetchall()
+            history.extend(dict(row) for row in rows if row["id"] not in seen)
+            seen.update(row["id"] for row in rows)
+            history.sort(key=lambda row: row["timestamp"], reverse=True)
+
+        return history[:limit]
+
 def get_farmer_history(farmer_name):
-    """Get prediction history for a farmer"""
+    """
+    Get prediction history for every farmer who has been registered under a
+    name that normalizes to farmer_name, including spellings since replaced
+    """
+    return _recent_history(
+        "farmer_id IN (SELECT farmer_id FROM main.farmer_aliases WHERE name_key = ?)",
+        (normalize_name(farmer_name),)
+    )
+
+def get_farmer_history_by_id(farmer_id):
+    """Get prediction history for one registered farmer"""
+    return _recent_history("farmer_id = ?", (farmer_id,))
+
+def get_farmer(farmer_id):
     with get_db() as conn:
-        cursor = conn.execute("""
-            SELECT * FROM predictions 
-            WHERE farmer_name = ? 
-            ORDER BY timestamp DESC 
-            LIMIT 10
-        """, (farmer_name,))
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        row = conn.execute(
+            "SELECT id, name, phone, region, created_at FROM farmers WHERE id = ?", (farmer_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+def get_prediction_columns():
+    """Get (name, declared type) for each predictions column"""
+    with get_db() as conn:
+        cursor = conn.execute("PRAGMA table_info(predictions)")
+        return [(row["name"], row["type"]) for row in cursor.fetchall()]
+
+def iter_predictions(region=None, crop_type=None, start=None, end=None, chunk_size=500):
+    """
+    Stream predictions in timestamp order as lists of dicts, chunk_size rows at a time
+    - start is inclusive, end is exclusive (ISO dates or timestamps)
+    - Rows are pulled from the cursor incrementally, so memory stays constant
+    - The connection may be resumed from another thread (streaming responses
+      advance the generator in a threadpool), but only one at a time
+    - Monthly archive partitions overlapping [start, end) are attached and
+      read first (oldest to newest), then the hot table
+    - The hot table is read from a snapshot taken before any archive, and
+      archived rows still in that snapshot are skipped, so a rollover running
+      during the export neither drops nor repeats rows
+    """
+    from archive import partitions_for_range, attach_partition
+
+    clauses = []
+    params = []
+    if region:
+        clauses.append("region = ?")
+        params.append(region)
+    if crop_type:
+        clauses.append("crop_type = ? COLLATE NOCASE")
+        params.append(crop_type)
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        clauses.append("timestamp < ?")
+        params.append(end)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    def fetch_chunks(conn, table, hot=None):
+        cursor = conn.execute(f"""
+            SELECT * FROM {table}
+            {where}
+            ORDER BY timestamp
+        """, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if hot is not None:
+                # Rows the rollover copied but the snapshot still holds come from there
+                ids = [row["id"] for row in rows]
+                in_hot = {
+                    row[0] for row in hot.execute(
+                        f"SELECT id FROM predictions WHERE id IN ({', '.join('?' * len(ids))})",
+                        ids
+                    )
+                }
+                rows = [row for row in rows if row["id"] not in in_hot]
+                if not rows:
+                    continue
+            yield [dict(row) for row in rows]
+
+    with get_db(check_same_thread=False) as hot, get_db(check_same_thread=False) as conn:
+        # A read transaction pins the hot table's snapshot until the export ends
+        hot.execute("BEGIN")
+        hot.execute("SELECT 1 FROM predictions LIMIT 1").fetchall()
+
+        for key in partitions_for_range(start, end):
+            with attach_partition(conn, key) as schema:
+                yield from fetch_chunks(conn, f"{schema}.predictions", hot=hot)
+
+        yield from fetch_chunks(hot, "main.predictions")
@@ -0,0 +1,161 @@
+import os
+import math
+import threading
+import time
+from collections import OrderedDict, Counter
+
+from models import normalize_phone
+
+# Share of a stage bucket each urgency must leave untouched, so that when
+# quota runs low LOW advisories lose voice/WhatsApp first and URGENT last
+URGENCY_RESERVE = {
+    "URGENT": 0.0,
+    "MODERATE": 0.25,
+    "LOW": 0.5,
+}
+
+# Above this share of MAX_IN_FLIGHT the service counts as saturated
+SATURATION_THRESHOLD = 0.8
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens/second, holding at most `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, reserve=0.0):
+        """Whether one token can be taken while keeping `reserve` of capacity"""
+        self.refill()
+        return self.tokens - 1 >= reserve * self.capacity
+
+    def take(self):
+        self.tokens -= 1
+
+    def retry_after(self):
+        """Seconds until one token is available"""
+        return max(1, math.ceil((1 - self.tokens) / self.rate)) if self.rate > 0 else 60
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Admission control for the predict endpoint
+    - Token buckets per phone, per region and global gate new requests
+    - A bounded in-flight count caps concurrent pipelines
+    - Per-stage buckets (gTTS, Twilio) are drawn on by urgency, shedding LOW first
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.max_in_flight = int(os.getenv("MAX_IN_FLIGHT", "16"))
+        self.in_flight = 0
+
+        self.global_bucket = TokenBucket(
+            _env_float("GLOBAL_RATE", 20), _env_float("GLOBAL_BURST", 40)
+        )
+        self.region_limits = (_env_float("REGION_RATE", 5), _env_float("REGION_BURST", 10))
+        self.phone_limits = (_env_float("PHONE_RATE", 0.1), _env_float("PHONE_BURST", 3))
+        self.max_tracked_keys = int(os.getenv("MAX_TRACKED_KEYS", "10000"))
+        self.region_buckets = OrderedDict()
+        self.phone_buckets = OrderedDict()
+
+        self.stage_buckets = {
+            "voice": TokenBucket(_env_float("GTTS_RATE", 2), _env_float("GTTS_BURST", 20)),
+            "whatsapp": TokenBucket(_env_float("TWILIO_RATE", 1), _env_float("TWILIO_BURST", 10)),
+        }
+
+        self.shed = Counter()
+
+    def _bucket(self, buckets, key, limits):
+        # Keep only recently seen keys so per-phone state stays bounded
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(*limits)
+            if len(buckets) > self.max_tracked_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def acquire(self, phone, region):
+        """
+        Admit one predict request or raise AdmissionRejected
+        Every successful acquire must be paired with release()
+        """
+        phone_key = normalize_phone(phone)
+
+        with self.lock:
+            if self.in_flight >= self.max_in_flight:
+                self.shed["rejected_in_flight"] += 1
+                raise AdmissionRejected(503, "Server busy, too many requests in progress", 1)
+
+            checks = [("global", self.global_bucket)]
+            checks.append(("region", self._bucket(self.region_buckets, region, self.region_limits)))
+            if phone_key:
+                checks.append(("phone", self._bucket(self.phone_buckets, phone_key, self.phone_limits)))
+
+            # Check every bucket before taking from any, so a rejection costs nothing
+            for name, bucket in checks:
+                if not bucket.available():
+                    self.shed[f"rejected_{name}"] += 1
+                    status = 503 if name == "global" else 429
+                    raise AdmissionRejected(
+                        status, f"Rate limit exceeded ({name})", bucket.retry_after()
+                    )
+
+            for _, bucket in checks:
+                bucket.take()
+            self.in_flight += 1
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def saturated(self):
+        return self.in_flight >= self.max_in_flight * SATURATION_THRESHOLD
+
+    def allow_stage(self, stage, urgency):
+        """
+        Whether an optional stage ("voice", "whatsapp") should run for this urgency
+        Shed stages are counted; URGENT may drain the bucket completely
+        """
+        reserve = URGENCY_RESERVE.get(urgency, 0.0)
+        with self.lock:
+            if urgency == "LOW" and self.saturated():
+                self.shed[f"degraded_{stage}_{urgency.lower()}"] += 1
+                return False
+
+            bucket = self.stage_buckets[stage]
+            if not bucket.available(reserve):
+                self.shed[f"degraded_{stage}_{urgency.lower()}"] += 1
+                return False
+
+            bucket.take()
+            return True
+
+    def stats(self):
+        with self.lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "saturated": self.saturated(),
+                "shed": dict(self.shed),
+            }
+
+admission = AdmissionController()
@@ -0,0 +1,197 @@
+import argparse
+import os
+import re
+import logging
+from urllib.parse import quote
+from datetime import datetime
+from contextlib import contextmanager
+
+from models import get_db
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = "../archive"
+HOT_MONTHS = int(os.getenv("HOT_MONTHS", "3"))
+ROLLOVER_BATCH_SIZE = 500
+
+ARCHIVE_FILE_PATTERN = re.compile(r"^predictions_(\d{4})_(\d{2})\.db$")
+
+def month_key(year, month):
+    return f"{year:04d}-{month:02d}"
+
+def next_month(key):
+    year, month = int(key[:4]), int(key[5:7])
+    if month == 12:
+        return month_key(year + 1, 1)
+    return month_key(year, month + 1)
+
+def archive_path(key):
+    return os.path.join(ARCHIVE_DIR, f"predictions_{key[:4]}_{key[5:7]}.db")
+
+def archive_uri(key):
+    """Read-only SQLite URI for a month's archive"""
+    return f"file:{quote(os.path.abspath(archive_path(key)))}?mode=ro"
+
+def list_archived_months():
+    """Months ("YYYY-MM") that have an archive file, oldest first"""
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    months = []
+    for name in os.listdir(ARCHIVE_DIR):
+        match = ARCHIVE_FILE_PATTERN.match(name)
+        if match:
+            months.append(month_key(int(match.group(1)), int(match.group(2))))
+    return sorted(months)
+
+def partitions_for_range(start=None, end=None):
+    """
+    Archived months overlapping [start, end)
+    Timestamps are ISO strings, so plain string comparison orders them
+    """
+    return [
+        key for key in list_archived_months()
+        if (end is None or key < end) and (start is None or next_month(key) > start)
+    ]
+
+def _ensure_archive_schema(conn, schema):
+    """
+    Create the archive table like the hot one and add any columns it has since gained
+    Archives use WAL too, so exports reading a month never block rollover into it
+    """
+    conn.execute(f"PRAGMA {schema}.journal_mode=WAL")
+    table_sql = conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = 'predictions'"
+    ).fetchone()[0]
+    conn.execute(table_sql.replace(
+        "CREATE TABLE predictions",
+        f"CREATE TABLE IF NOT EXISTS {schema}.predictions",
+        1
+    ))
+
+    archived = {row["name"] for row in conn.execute(f"PRAGMA {schema}.table_info(predictions)")}
+    for row in conn.execute("PRAGMA main.table_info(predictions)").fetchall():
+        if row["name"] not in archived:
+            conn.execute(
+                f"ALTER TABLE {schema}.predictions ADD COLUMN {row['name']} {row['type']}"
+            )
+
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_predictions_timestamp
+        ON predictions (timestamp)
+    """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {schema}.idx_predictions_farmer
+        ON predictions (farmer_id, timestamp)
+    """)
+    conn.commit()
+
+@contextmanager
+def attach_partition(conn, key, writable=False):
+    """
+    ATTACH one month's archive to conn for the duration of the block
+    - Read-only by default, with no DDL; init_db and rollover keep archive
+      schemas in sync, so reads never need to
+    - writable=True creates the archive if needed and syncs its schema
+    """
+    schema = f"archive_{key[:4]}_{key[5:7]}"
+    target = archive_path(key) if writable else archive_uri(key)
+    conn.execute("ATTACH DATABASE ? AS " + schema, (target,))
+    try:
+        if writable:
+            _ensure_archive_schema(conn, schema)
+        yield schema
+    finally:
+        conn.execute(f"DETACH DATABASE {schema}")
+
+def rollover(hot_months=HOT_MONTHS, batch_size=ROLLOVER_BATCH_SIZE):
+    """
+    Move predictions older than the last hot_months months into per-month archives
+    - Rows move in small batches, each its own short transaction, so
+      concurrent inserts only ever wait for one batch
+    - Each batch is committed to the archive before it is deleted from the
+      hot table, so a concurrent reader may see a row in both places (readers
+      de-duplicate by id) but never in neither
+    - INSERT OR IGNORE keeps ids, so an interrupted run can simply be rerun
+    """
+    if hot_months < 1:
+        raise ValueError("hot_months must be at least 1 (the current month stays hot)")
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+    now = datetime.now()
+    year, month = now.year, now.month - (hot_months - 1)
+    while month < 1:
+        year -= 1
+        month += 12
+    cutoff = month_key(year, month)
+
+    moved = {}
+    with get_db() as conn:
+        conn.execute("PRAGMA busy_timeout = 5000")
+        months = [
+            row[0] for row in conn.execute("""
+                SELECT DISTINCT substr(timestamp, 1, 7) FROM predictions
+                WHERE timestamp < ?
+            """, (cutoff,)).fetchall()
+        ]
+
+        for key in sorted(months):
+            with attach_partition(conn, key, writable=True) as schema:
+                columns = ", ".join(
+                    row["name"] for row in conn.execute("PRAGMA main.table_info(predictions)")
+                )
+                moved[key] = 0
+                while True:
+                    ids = [
+                        row[0] for row in conn.execute("""
+                            SELECT id FROM main.predictions
+                            WHERE timestamp >= ? AND timestamp < ?
+                            ORDER BY id LIMIT ?
+                        """, (key, next_month(key), batch_size)).fetchall()
+                    ]
+                    if not ids:
+                        break
+
+                    placeholders = ", ".join("?" * len(ids))
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO {schema}.predictions ({columns})
+                        SELECT {columns} FROM main.predictions WHERE id IN ({placeholders})
+                    """, ids)
+                    conn.commit()
+                    conn.execute(
+                        f"DELETE FROM main.predictions WHERE id IN ({placeholders})", ids
+                    )
+                    conn.commit()
+                    moved[key] += len(ids)
+
+            logger.info(f"Archived {moved[key]} predictions for {key}")
+
+    return moved
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage monthly prediction archives")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollover_parser = subparsers.add_parser("rollover", help="Move old months into archive files")
+    rollover_parser.add_argument("--hot-months", type=int, default=HOT_MONTHS)
+    rollover_parser.add_argument("--batch-size", type=int, default=ROLLOVER_BATCH_SIZE)
+
+    subparsers.add_parser("list", help="List archived months")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rollover":
+        if args.hot_months < 1:
+            parser.error("--hot-months must be at least 1")
+        moved = rollover(hot_months=args.hot_months, batch_size=args.batch_size)
+        for key, count in moved.items():
+            print(f"{key}: {count} rows archived")
+        if not moved:
+            print("Nothing to archive")
+    else:
+        for key in list_archived_months():
+            print(f"{key}\t{archive_path(key)}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
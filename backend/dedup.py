@@ -0,0 +1,112 @@
+import os
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+from models import normalize_name, normalize_phone
+
+# Identical submissions within this many seconds get the stored result
+DEDUP_WINDOW = float(os.getenv("DEDUP_WINDOW", "120"))
+MAX_STORED_RESULTS = int(os.getenv("DEDUP_MAX_STORED_RESULTS", "10000"))
+# Decimal places kept from coordinates (~100 m)
+COORDINATE_PRECISION = 3
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused for a request with a different body"""
+
+def request_fingerprint(farmer_name, phone, crop_type, region, latitude, longitude,
+                        image_bytes=None):
+    """
+    Stable key for a predict submission
+    Region only counts without coordinates; with them it is resolved from the location
+    """
+    def coordinate(value):
+        return f"{value:.{COORDINATE_PRECISION}f}" if value is not None else ""
+
+    has_coordinates = bool(latitude and longitude)
+    parts = [
+        normalize_name(farmer_name),
+        normalize_phone(phone) or "",
+        crop_type.strip().lower(),
+        "" if has_coordinates else region.strip().lower(),
+        coordinate(latitude),
+        coordinate(longitude),
+        hashlib.sha256(image_bytes).hexdigest() if image_bytes else "",
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+class RequestDeduplicator:
+    """
+    Collapses duplicate requests onto one computation
+    - a duplicate of a running request awaits the same result
+    - a duplicate of a completed request gets the stored result until it expires
+    Failures are shared with waiting duplicates but never stored.
+
+    Requests are always matched by fingerprint. An Idempotency-Key is an extra
+    key bound to the fingerprint: a retry with the key matches even if the
+    fingerprint is gone, and reusing the key for a different request is refused.
+    """
+
+    def __init__(self, window=DEDUP_WINDOW, max_results=MAX_STORED_RESULTS):
+        self.window = window
+        self.max_results = max_results
+        self.in_flight = {}  # key -> (fingerprint, future)
+        self.completed = OrderedDict()  # key -> (expires_at, fingerprint, result), oldest first
+
+    def _expire(self):
+        now = time.monotonic()
+        while self.completed:
+            key, (expires_at, _, _) = next(iter(self.completed.items()))
+            if expires_at > now and len(self.completed) <= self.max_results:
+                break
+            del self.completed[key]
+
+    async def run(self, fingerprint, compute, idempotency_key=None):
+        """
+        Return (result, source), where source is "computed", "in_flight" or "completed"
+        compute is a zero-argument coroutine function
+        Raises IdempotencyConflict if idempotency_key is already held for another fingerprint
+        """
+        self._expire()
+
+        keys = [fingerprint]
+        if idempotency_key:
+            keys.insert(0, f"idempotency-key:{idempotency_key}")
+
+        for key in keys:
+            stored = self.completed.get(key)
+            if stored is not None:
+                _, stored_fingerprint, result = stored
+                if stored_fingerprint != fingerprint:
+                    raise IdempotencyConflict(idempotency_key)
+                return result, "completed"
+
+            pending = self.in_flight.get(key)
+            if pending is not None:
+                pending_fingerprint, pending_future = pending
+                if pending_fingerprint != fingerprint:
+                    raise IdempotencyConflict(idempotency_key)
+                return await asyncio.shield(pending_future), "in_flight"
+
+        future = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self.in_flight[key] = (fingerprint, future)
+        try:
+            result = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when no duplicate is waiting
+            raise
+        else:
+            future.set_result(result)
+            expires_at = time.monotonic() + self.window
+            for key in keys:
+                self.completed[key] = (expires_at, fingerprint, result)
+            self._expire()
+            return result, "computed"
+        finally:
+            for key in keys:
+                del self.in_flight[key]
+
+deduplicator = RequestDeduplicator()
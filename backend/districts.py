@@ -0,0 +1,171 @@
+import json
+import math
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DISTRICTS_PATH = "../data/odisha_districts.geojson"
+CELL_SIZE = 0.05  # degrees (~5 km)
+
+# Bounds the (points x edges) scratch arrays used by batch point-in-polygon
+_MAX_BROADCAST = 1 << 20
+
+class DistrictResolver:
+    """
+    Resolve coordinates to district names using a precomputed grid index
+
+    At load, every grid cell is classified against each polygon:
+    - interior cells lie wholly inside one district and resolve by lookup
+    - boundary cells (crossed by any polygon edge) keep as candidates every
+      district whose bounding box covers the cell, tested with point-in-polygon
+    Cells outside every polygon resolve to None.
+    """
+
+    def __init__(self, features, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.names = []
+        # One entry per polygon part: (district index, edges as x1, y1, x2, y2 arrays)
+        self.parts = []
+
+        for feature in features:
+            geometry = feature["geometry"]
+            polygons = geometry["coordinates"]
+            if geometry["type"] == "Polygon":
+                polygons = [polygons]
+            self.names.append(feature["properties"]["district"])
+            for rings in polygons:
+                edges = [self._ring_edges(ring) for ring in rings]
+                self.parts.append((len(self.names) - 1, np.concatenate(edges)))
+
+        all_edges = np.concatenate([edges for _, edges in self.parts])
+        self.min_x = all_edges[:, [0, 2]].min()
+        self.min_y = all_edges[:, [1, 3]].min()
+        self.nx = int(math.ceil((all_edges[:, [0, 2]].max() - self.min_x) / cell_size)) + 1
+        self.ny = int(math.ceil((all_edges[:, [1, 3]].max() - self.min_y) / cell_size)) + 1
+
+        # -1 = not an interior cell
+        self.interior = np.full((self.ny, self.nx), -1, dtype=np.int32)
+        # Per part, the boundary cells where it must be tested
+        self.candidates = np.zeros((len(self.parts), self.ny, self.nx), dtype=bool)
+        self._build_index()
+
+        logger.info(
+            f"District index built: {len(self.names)} districts, "
+            f"{self.nx}x{self.ny} cells of {cell_size} degrees"
+        )
+
+    @staticmethod
+    def _ring_edges(ring):
+        points = np.asarray(ring, dtype=np.float64)
+        return np.column_stack([points[:-1], points[1:]])
+
+    def _cells(self, x, y):
+        ix = np.floor((np.asarray(x) - self.min_x) / self.cell_size).astype(np.int64)
+        iy = np.floor((np.asarray(y) - self.min_y) / self.cell_size).astype(np.int64)
+        return ix, iy
+
+    def _build_index(self):
+        touched = np.zeros((self.ny, self.nx), dtype=bool)
+        for _, edges in self.parts:
+            # Conservative: mark every cell in each edge's bounding box
+            ix1, iy1 = self._cells(edges[:, 0], edges[:, 1])
+            ix2, iy2 = self._cells(edges[:, 2], edges[:, 3])
+            for x0, x1, y0, y1 in zip(
+                np.minimum(ix1, ix2), np.maximum(ix1, ix2),
+                np.minimum(iy1, iy2), np.maximum(iy1, iy2)
+            ):
+                touched[y0:y1 + 1, x0:x1 + 1] = True
+
+        # In a boundary cell, any part whose bounding box covers the cell may
+        # contain some of it, even if none of that part's own edges pass through
+        for p, (_, edges) in enumerate(self.parts):
+            ix, iy = self._cells(edges[:, [0, 2]], edges[:, [1, 3]])
+            self.candidates[p, iy.min():iy.max() + 1, ix.min():ix.max() + 1] = True
+        self.candidates &= touched
+
+        # A cell no edge touches is wholly inside or outside each part, so its
+        # centre decides for the whole cell
+        untouched = ~touched
+        iy, ix = np.nonzero(untouched)
+        centres_x = self.min_x + (ix + 0.5) * self.cell_size
+        centres_y = self.min_y + (iy + 0.5) * self.cell_size
+        for p, (district, edges) in enumerate(self.parts):
+            inside = self._contains(edges, centres_x, centres_y)
+            self.interior[iy[inside], ix[inside]] = district
+
+    @staticmethod
+    def _contains(edges, x, y):
+        """Even-odd ray casting of points (x, y) against a part's edges"""
+        x1, y1, x2, y2 = (edges[:, i] for i in range(4))
+        result = np.zeros(len(x), dtype=bool)
+        step = max(1, _MAX_BROADCAST // len(edges))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for start in range(0, len(x), step):
+                px = x[start:start + step, None]
+                py = y[start:start + step, None]
+                straddles = (y1 > py) != (y2 > py)
+                crossing_x = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+                crossings = straddles & (px < crossing_x)
+                result[start:start + step] = crossings.sum(axis=1) % 2 == 1
+        return result
+
+    def resolve(self, latitude, longitude):
+        """District name for one point, or None"""
+        ix, iy = self._cells(longitude, latitude)
+        if not (0 <= ix < self.nx and 0 <= iy < self.ny):
+            return None
+
+        district = self.interior[iy, ix]
+        if district >= 0:
+            return self.names[district]
+
+        x = np.array([longitude], dtype=np.float64)
+        y = np.array([latitude], dtype=np.float64)
+        for p in np.nonzero(self.candidates[:, iy, ix])[0]:
+            district, edges = self.parts[p]
+            if self._contains(edges, x, y)[0]:
+                return self.names[district]
+        return None
+
+    def resolve_many(self, latitudes, longitudes):
+        """District names for arrays of points (object array, None where unresolved)"""
+        y = np.asarray(latitudes, dtype=np.float64).ravel()
+        x = np.asarray(longitudes, dtype=np.float64).ravel()
+        ix, iy = self._cells(x, y)
+        in_grid = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        ix = np.where(in_grid, ix, 0)
+        iy = np.where(in_grid, iy, 0)
+
+        districts = np.where(in_grid, self.interior[iy, ix], -1)
+        pending = in_grid & (districts < 0)
+        for p, (district, edges) in enumerate(self.parts):
+            candidates = np.nonzero(pending & self.candidates[p, iy, ix])[0]
+            if len(candidates) == 0:
+                continue
+            hits = candidates[self._contains(edges, x[candidates], y[candidates])]
+            districts[hits] = district
+            pending[hits] = False
+
+        names = np.array(self.names + [None], dtype=object)
+        return names[districts]
+
+@lru_cache(maxsize=None)
+def get_resolver():
+    """Load district boundaries and build the index (once per process)"""
+    try:
+        with open(DISTRICTS_PATH, encoding="utf-8") as f:
+            features = json.load(f)["features"]
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"District boundaries unavailable ({e}), region stays as submitted")
+        return None
+    return DistrictResolver(features)
+
+def resolve_region(latitude, longitude):
+    """District for coordinates, or None if unknown"""
+    resolver = get_resolver()
+    if resolver is None:
+        return None
+    return resolver.resolve(latitude, longitude)
@@ -0,0 +1,110 @@
+import argparse
+import csv
+import io
+import json
+import sys
+
+from models import get_prediction_columns, iter_predictions
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def iter_csv(batches, columns):
+    """Yield CSV text one chunk at a time (header first)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+def iter_ndjson(batches):
+    """Yield newline-delimited JSON one chunk at a time"""
+    for batch in batches:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+
+def parquet_schema(column_types):
+    """Map SQLite declared column types onto an Arrow schema"""
+    arrow_types = {
+        "INTEGER": pa.int64(),
+        "REAL": pa.float64(),
+    }
+    return pa.schema([
+        (name, arrow_types.get(declared.upper(), pa.string()))
+        for name, declared in column_types
+    ])
+
+def write_parquet(batches, column_types, destination):
+    """
+    Write batches as Parquet row groups
+    Only one batch is held in memory at a time
+    """
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    schema = parquet_schema(column_types)
+    rows_written = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            rows_written += len(batch)
+    return rows_written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export FarmConnect predictions")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--region")
+    parser.add_argument("--crop-type")
+    parser.add_argument("--start", help="Inclusive start date, e.g. 2024-01-01")
+    parser.add_argument("--end", help="Exclusive end date, e.g. 2024-04-01")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--output", help="Output file (default: stdout; required for parquet)")
+    args = parser.parse_args(argv)
+
+    batches = iter_predictions(
+        region=args.region,
+        crop_type=args.crop_type,
+        start=args.start,
+        end=args.end,
+        chunk_size=args.chunk_size
+    )
+    column_types = get_prediction_columns()
+
+    if args.format == "parquet":
+        if not args.output:
+            parser.error("--output is required for parquet")
+        rows = write_parquet(batches, column_types, args.output)
+        print(f"Wrote {rows} rows to {args.output}", file=sys.stderr)
+        return
+
+    if args.format == "csv":
+        chunks = iter_csv(batches, [name for name, _ in column_types])
+    else:
+        chunks = iter_ndjson(batches)
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+if __name__ == "__main__":
+    main()
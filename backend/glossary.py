@@ -0,0 +1,145 @@
+import json
+import os
+import re
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+GLOSSARY_DIR = "../data"
+TRANSLATION_CACHE_SIZE = 1024
+
+WORD_CHAR = re.compile(r"\w")
+
+class Glossary:
+    """
+    Term glossary for one language compiled into a trie-shaped regex.
+
+    Terms are merged into a character trie and the regex mirrors it, so at any
+    position the engine follows one branch per character instead of trying
+    every term: the cost per position is bounded by the longest term, not by
+    the number of terms. Longer continuations are tried before a term ends,
+    so the longest term wins ("Brown Plant Hopper" over "Brown").
+
+    All-caps terms (advisory labels such as "LOW" or "ACTION", acronyms such
+    as "BPH") match only as written; other terms match in any case.
+    """
+
+    def __init__(self, terms):
+        self.exact = {}
+        self.folded = {}
+        for source, target in terms.items():
+            if source.isupper():
+                self.exact[source] = target
+            else:
+                self.folded.setdefault(source.lower(), target)
+
+        # Keyed by lowercased characters; None marks the end of a term
+        self.trie = {}
+        for term in list(self.exact) + list(self.folded):
+            node = self.trie
+            for char in self._fold(term):
+                node = node.setdefault(char, {})
+            node[None] = True
+
+        if self.trie:
+            self.pattern = re.compile(
+                r"(?<!\w)" + self._trie_regex(self.trie) + r"(?!\w)", re.IGNORECASE
+            )
+        else:
+            self.pattern = None
+
+    @classmethod
+    def _trie_regex(cls, node):
+        branches = [
+            re.escape(char) + cls._trie_regex(child)
+            for char, child in sorted(node.items(), key=lambda item: item[0] or "")
+            if char is not None
+        ]
+        if not branches:
+            return ""
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if None in node else group
+
+    @staticmethod
+    def _fold(text):
+        folded = text.lower()
+        if len(folded) == len(text):
+            return folded
+        # A few characters lowercase to several; fold per character so
+        # positions still line up with the original text
+        return [char.lower() if len(char.lower()) == 1 else char for char in text]
+
+    def _lookup(self, term):
+        if term in self.exact:
+            return self.exact[term]
+        return self.folded.get(term.lower())
+
+    def _longest_match(self, text, start):
+        """
+        (end, target) of the longest term at start, walking the trie directly
+        Only needed when the regex's longest match is an all-caps term in the
+        wrong case, which may hide a shorter term that does apply
+        """
+        folded = self._fold(text[start:])
+        match = None
+        node = self.trie
+        end = 0
+        while end < len(folded) and folded[end] in node:
+            node = node[folded[end]]
+            end += 1
+            if None in node and not WORD_CHAR.match(text, start + end):
+                target = self._lookup(text[start:start + end])
+                if target is not None:
+                    match = (start + end, target)
+        return match
+
+    def translate(self, text):
+        if self.pattern is None:
+            return text
+
+        parts = []
+        copied = position = 0
+        while True:
+            match = self.pattern.search(text, position)
+            if match is None:
+                break
+            start, end = match.span()
+            target = self._lookup(match.group(0))
+            if target is None:
+                longest = self._longest_match(text, start)
+                if longest is None:
+                    position = start + 1
+                    continue
+                end, target = longest
+            parts.append(text[copied:start])
+            parts.append(target)
+            copied = position = end
+
+        parts.append(text[copied:])
+        return "".join(parts)
+
+@lru_cache(maxsize=None)
+def load_glossary(language):
+    """
+    Load and compile the glossary for a language (once per process)
+    Files live in GLOSSARY_DIR as glossary_<language>.json
+    """
+    path = os.path.join(GLOSSARY_DIR, f"glossary_{language}.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            terms = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Glossary for {language} unavailable ({e}), text left untranslated")
+        terms = {}
+
+    logger.info(f"Loaded {len(terms)} glossary terms for {language}")
+    return Glossary(terms)
+
+@lru_cache(maxsize=TRANSLATION_CACHE_SIZE)
+def localize(text, language):
+    """
+    Replace glossary terms in text for the given language
+    Advisories repeat heavily, so results are memoized
+    """
+    return load_glossary(language).translate(text)
@@ -0,0 +1,129 @@
+import os
+import math
+import threading
+import logging
+from collections import deque, Counter
+from datetime import datetime, timedelta
+
+from models import iter_predictions
+
+logger = logging.getLogger(__name__)
+
+HOTSPOT_CELL_SIZE = float(os.getenv("HOTSPOT_CELL_SIZE", "0.05"))  # degrees (~5 km)
+HOTSPOT_WINDOW_DAYS = int(os.getenv("HOTSPOT_WINDOW_DAYS", "7"))
+# A cell is flagged when it has at least MIN_DETECTIONS of a pest and its
+# incidence is INCIDENCE_FACTOR times the incidence across all cells
+MIN_DETECTIONS = int(os.getenv("HOTSPOT_MIN_DETECTIONS", "3"))
+INCIDENCE_FACTOR = float(os.getenv("HOTSPOT_INCIDENCE_FACTOR", "1.5"))
+
+PEST_TYPES = ("BPH", "Blast", "Brown Spot")
+
+class SlidingWindow:
+    """Daily buckets of prediction and pest counts with running window totals"""
+
+    def __init__(self):
+        self.buckets = deque()  # [day, predictions, Counter of pests]
+        self.predictions = 0
+        self.pests = Counter()
+
+    def add(self, day, pest_type):
+        if not self.buckets or self.buckets[-1][0] != day:
+            self.buckets.append([day, 0, Counter()])
+        bucket = self.buckets[-1]
+        bucket[1] += 1
+        self.predictions += 1
+        if pest_type in PEST_TYPES:
+            bucket[2][pest_type] += 1
+            self.pests[pest_type] += 1
+
+    def evict(self, oldest_day):
+        while self.buckets and self.buckets[0][0] < oldest_day:
+            _, predictions, pests = self.buckets.popleft()
+            self.predictions -= predictions
+            self.pests -= pests
+
+class HotspotDetector:
+    """
+    Incremental pest-outbreak detection over a spatial grid
+    - add() is O(1) amortized: one bucket update plus eviction of expired days
+    - hotspots() reads the maintained window counts, never the database
+    """
+
+    def __init__(self, cell_size=HOTSPOT_CELL_SIZE, window_days=HOTSPOT_WINDOW_DAYS):
+        self.cell_size = cell_size
+        self.window_days = window_days
+        self.lock = threading.Lock()
+        self.cells = {}
+        self.overall = SlidingWindow()
+
+    def _cell(self, latitude, longitude):
+        return (math.floor(latitude / self.cell_size), math.floor(longitude / self.cell_size))
+
+    def _oldest_day(self, day):
+        return day - self.window_days + 1
+
+    def add(self, latitude, longitude, pest_type, when=None):
+        day = (when or datetime.now()).date().toordinal()
+        oldest_day = self._oldest_day(day)
+        with self.lock:
+            window = self.cells.get(self._cell(latitude, longitude))
+            if window is None:
+                window = self.cells[self._cell(latitude, longitude)] = SlidingWindow()
+            window.add(day, pest_type)
+            window.evict(oldest_day)
+            self.overall.add(day, pest_type)
+            self.overall.evict(oldest_day)
+
+    def load_recent(self):
+        """Rebuild state from the last window of stored predictions (at startup)"""
+        since = (datetime.now() - timedelta(days=self.window_days)).date().isoformat()
+        loaded = 0
+        for batch in iter_predictions(start=since):
+            for row in batch:
+                if row.get("latitude") is None or row.get("longitude") is None:
+                    continue
+                self.add(
+                    row["latitude"], row["longitude"], row["pest_type"],
+                    when=datetime.fromisoformat(row["timestamp"])
+                )
+                loaded += 1
+        logger.info(f"Hotspot detector loaded {loaded} recent predictions")
+
+    def hotspots(self, pest_type=None):
+        """Cells whose pest incidence in the window exceeds the overall baseline"""
+        pests = [pest_type] if pest_type else PEST_TYPES
+        oldest_day = self._oldest_day(datetime.now().date().toordinal())
+        results = []
+
+        with self.lock:
+            self.overall.evict(oldest_day)
+            for cell in list(self.cells):
+                window = self.cells[cell]
+                window.evict(oldest_day)
+                if not window.predictions:
+                    del self.cells[cell]
+                    continue
+
+                for pest in pests:
+                    detections = window.pests[pest]
+                    if detections < MIN_DETECTIONS:
+                        continue
+                    baseline = self.overall.pests[pest] / self.overall.predictions
+                    incidence = detections / window.predictions
+                    if incidence >= min(1.0, baseline * INCIDENCE_FACTOR):
+                        lat_index, lon_index = cell
+                        results.append({
+                            "pest_type": pest,
+                            "latitude": round((lat_index + 0.5) * self.cell_size, 4),
+                            "longitude": round((lon_index + 0.5) * self.cell_size, 4),
+                            "cell_size": self.cell_size,
+                            "detections": detections,
+                            "predictions": window.predictions,
+                            "incidence": round(incidence, 3),
+                            "baseline": round(baseline, 3),
+                        })
+
+        results.sort(key=lambda h: (h["incidence"], h["detections"]), reverse=True)
+        return results
+
+hotspot_detector = HotspotDetector()
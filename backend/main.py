@@ -1,17 +1,27 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import Optional
 import uvicorn
 from datetime import datetime
 import logging
+import os
+import tempfile
 
-from models import init_db, save_prediction
+from models import init_db, save_prediction, upsert_farmer, get_prediction_columns, iter_predictions
 from ml_model import predict_crop_health
-from satellite import get_satellite_data
+from satellite import get_satellite_data, get_cached_satellite_data
 from voice import generate_voice_message
-from whatsapp import send_whatsapp_notification
+from whatsapp import send_whatsapp_notification, is_configured as whatsapp_configured
+from districts import resolve_region
+from hotspots import hotspot_detector, PEST_TYPES
+from resilience import Deadline, call_dependency, breaker_status
+from admission import admission, AdmissionRejected
+from dedup import deduplicator, request_fingerprint, IdempotencyConflict
+from export import EXPORT_FORMATS, MEDIA_TYPES, iter_csv, iter_ndjson, write_parquet
 
 # Initialize FastAPI
 app = FastAPI(title="FarmConnect AI API", version="1.0.0")
@@ -31,6 +41,7 @@ logger = logging.getLogger(__name__)
 
 # Initialize database
 init_db()
+hotspot_detector.load_recent()
 
 # Request models
 class FarmerQuery(BaseModel):
@@ -56,33 +67,105 @@ async def predict_crop(
     phone: str = Form(""),
     latitude: float = Form(None),
     longitude: float = Form(None),
-    image: Optional[UploadFile] = File(None)
+    image: Optional[UploadFile] = File(None),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Main prediction endpoint
+    - Repeats of a request (same farmer, phone, crop, rounded coordinates and
+      image within the dedup window, or same Idempotency-Key) share one result
     - Fetches satellite data if coordinates provided
     - Analyzes crop health using ML
     - Generates recommendation
     - Sends voice message + WhatsApp notification
+      (skipped for low-urgency advisories when the service is under load)
+    - External calls share one request deadline; stages that were shed,
+      timed out or fell back to cached data are listed under "degraded"
+    - Region is resolved from coordinates when they fall inside a known district
     """
+    image_bytes = await image.read() if image else None
+    fingerprint = request_fingerprint(
+        farmer_name, phone, crop_type, region, latitude, longitude, image_bytes
+    )
+
+    try:
+        response, source = await deduplicator.run(fingerprint, lambda: run_prediction(
+            region=region,
+            crop_type=crop_type,
+            farmer_name=farmer_name,
+            phone=phone,
+            latitude=latitude,
+            longitude=longitude,
+            image_name=image.filename if image else None,
+            image_bytes=image_bytes
+        ), idempotency_key=idempotency_key)
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if source != "computed":
+        logger.info(f"Duplicate prediction request for {farmer_name} served from {source} result")
+        return JSONResponse(content=response, headers={"X-Deduplicated": source})
+    return JSONResponse(content=response)
+
+def save_upload(image_path, image_bytes):
+    with open(image_path, "wb") as f:
+        f.write(image_bytes)
+
+async def run_prediction(region, crop_type, farmer_name, phone, latitude, longitude,
+                         image_name=None, image_bytes=None):
+    """
+    Run the full prediction pipeline for one (deduplicated) request
+    Blocking steps (file and database I/O, model inference, upstream calls) run
+    off the event loop, so admitted requests really overlap and the in-flight
+    bound and saturation-based shedding apply
+    """
+    region_source = "form"
+    if latitude and longitude:
+        resolved_region = resolve_region(latitude, longitude)
+        if resolved_region:
+            if resolved_region != region:
+                logger.info(f"Region {region} overridden by coordinates: {resolved_region}")
+            region = resolved_region
+            region_source = "coordinates"
+
+    try:
+        admission.acquire(phone, region)
+    except AdmissionRejected as e:
+        logger.warning(f"Request shed for {farmer_name} in {region}: {e.reason}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
     try:
         logger.info(f"Prediction request for {farmer_name} in {region}")
+        deadline = Deadline()
+        degraded = []
         
-        # Step 1: Get satellite data
+        # Step 1: Get satellite data (last known reading for the cell if the provider fails)
         satellite_data = None
         if latitude and longitude:
-            satellite_data = get_satellite_data(latitude, longitude)
-            logger.info(f"Satellite data retrieved: NDVI={satellite_data.get('ndvi', 'N/A')}")
+            satellite_data, satellite_degraded = await call_dependency(
+                "satellite", get_satellite_data, deadline, latitude, longitude,
+                fallback=lambda: get_cached_satellite_data(latitude, longitude)
+            )
+            if satellite_degraded:
+                degraded.append("satellite")
+            if satellite_data:
+                logger.info(f"Satellite data retrieved: NDVI={satellite_data.get('ndvi', 'N/A')}")
         
         # Step 2: Process uploaded image or use satellite data
         image_path = None
-        if image:
-            image_path = f"./temp/{image.filename}"
-            with open(image_path, "wb") as f:
-                f.write(await image.read())
+        if image_bytes:
+            image_path = f"./temp/{image_name}"
+            await run_in_threadpool(save_upload, image_path, image_bytes)
         
         # Step 3: ML prediction
-        prediction = predict_crop_health(
+        prediction = await run_in_threadpool(
+            predict_crop_health,
             image_path=image_path,
             satellite_data=satellite_data,
             crop_type=crop_type,
@@ -98,36 +181,64 @@ async def predict_crop(
             region=region
         )
         
+        urgency = recommendation['urgency']
+        
         # Step 5: Generate voice message (Odia)
-        voice_url = generate_voice_message(
-            recommendation_text=recommendation['message'],
-            language="odia"
-        )
+        voice_url = None
+        if admission.allow_stage("voice", urgency):
+            voice_url, voice_degraded = await call_dependency(
+                "voice", generate_voice_message, deadline,
+                recommendation_text=recommendation['message'],
+                language="odia",
+                failed=lambda url: url is None
+            )
+            if voice_degraded:
+                degraded.append("voice")
+        else:
+            degraded.append("voice")
         
         # Step 6: Send WhatsApp notification (if phone provided)
+        notification_sent = False
         if phone:
-            send_whatsapp_notification(
-                phone=phone,
-                message=recommendation['message'],
-                voice_url=voice_url
-            )
+            if admission.allow_stage("whatsapp", urgency):
+                notification_sent, whatsapp_degraded = await call_dependency(
+                    "whatsapp", send_whatsapp_notification, deadline,
+                    phone=phone,
+                    message=recommendation['message'],
+                    voice_url=voice_url,
+                    fallback=lambda: False,
+                    failed=lambda sent: not sent and whatsapp_configured()
+                )
+                if whatsapp_degraded:
+                    degraded.append("whatsapp")
+            else:
+                degraded.append("whatsapp")
         
-        # Step 7: Save to database
-        save_prediction(
+        # Step 7: Save to database (farmers are keyed by normalized phone)
+        farmer_id = await run_in_threadpool(upsert_farmer, farmer_name, phone, region)
+        await run_in_threadpool(
+            save_prediction,
+            farmer_id=farmer_id,
             farmer_name=farmer_name,
             region=region,
             crop_type=crop_type,
             health_score=prediction['health_score'],
             pest_type=prediction['pest_type'],
-            recommendation=recommendation['message']
+            recommendation=recommendation['message'],
+            latitude=latitude,
+            longitude=longitude
         )
+        if latitude and longitude:
+            hotspot_detector.add(latitude, longitude, prediction['pest_type'])
         
         # Response
         response = {
             "status": "success",
             "timestamp": datetime.now().isoformat(),
             "farmer": farmer_name,
+            "farmer_id": farmer_id,
             "region": region,
+            "region_source": region_source,
             "crop_type": crop_type,
             "analysis": {
                 "crop_health": prediction['health_score'],
@@ -142,17 +253,31 @@ async def predict_crop(
                 "timing": recommendation['timing'],
                 "cost": recommendation['cost'],
                 "market_price": recommendation['market_price'],
-                "full_message": recommendation['message']
+                "full_message": recommendation['message'],
+                "urgency": urgency
             },
             "voice_message_url": voice_url,
-            "notification_sent": bool(phone)
+            "notification_sent": notification_sent,
+            "degraded": degraded
         }
         
-        return JSONResponse(content=response)
+        return response
         
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission.release()
+
+@app.get("/api/v1/admission/stats")
+def get_admission_stats():
+    """In-flight load and counts of shed/degraded requests"""
+    return admission.stats()
+
+@app.get("/api/v1/dependencies/status")
+def get_dependency_status():
+    """Circuit breaker state for each external dependency"""
+    return breaker_status()
 
 @app.get("/api/v1/history/{farmer_name}")
 def get_farmer_history(farmer_name: str):
@@ -161,6 +286,76 @@ def get_farmer_history(farmer_name: str):
     history = get_farmer_history(farmer_name)
     return {"farmer": farmer_name, "history": history}
 
+@app.get("/api/v1/farmers/{farmer_id}/history")
+def get_registered_farmer_history(farmer_id: int):
+    """Get prediction history for a registered farmer"""
+    from models import get_farmer, get_farmer_history_by_id
+    farmer = get_farmer(farmer_id)
+    if farmer is None:
+        raise HTTPException(status_code=404, detail="Farmer not found")
+    return {"farmer": farmer, "history": get_farmer_history_by_id(farmer_id)}
+
+@app.get("/api/v1/export/predictions")
+def export_predictions(
+    format: str = "csv",
+    region: Optional[str] = None,
+    crop_type: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+):
+    """
+    Bulk export of predictions
+    - csv/ndjson are streamed straight from the database cursor
+    - parquet is written batch by batch to a temp file, then sent
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+
+    batches = iter_predictions(region=region, crop_type=crop_type, start=start, end=end)
+    column_types = get_prediction_columns()
+    filename = f"predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+
+    if format == "parquet":
+        fd, path = tempfile.mkstemp(suffix=".parquet")
+        os.close(fd)
+        try:
+            write_parquet(batches, column_types, path)
+        except RuntimeError as e:
+            os.remove(path)
+            raise HTTPException(status_code=501, detail=str(e))
+        except Exception:
+            os.remove(path)
+            raise
+        return FileResponse(
+            path,
+            media_type=MEDIA_TYPES[format],
+            filename=filename,
+            background=BackgroundTask(os.remove, path)
+        )
+
+    if format == "csv":
+        chunks = iter_csv(batches, [name for name, _ in column_types])
+    else:
+        chunks = iter_ndjson(batches)
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@app.get("/api/v1/hotspots")
+def get_hotspots(pest_type: Optional[str] = None):
+    """Current pest-outbreak hotspots (from the detector's sliding-window state)"""
+    if pest_type and pest_type not in PEST_TYPES:
+        raise HTTPException(status_code=400, detail=f"pest_type must be one of {', '.join(PEST_TYPES)}")
+    return {"pest_type": pest_type, "hotspots": hotspot_detector.hotspots(pest_type)}
+
+@app.get("/api/v1/resolve-region")
+def get_region_for_coordinates(latitude: float, longitude: float):
+    """Resolve the district containing a point"""
+    return {"latitude": latitude, "longitude": longitude, "region": resolve_region(latitude, longitude)}
+
 @app.get("/api/v1/market-prices/{region}")
 def get_market_prices(region: str):
     """Get current market prices for region"""
@@ -233,6 +428,7 @@ This is an AI-generated advisory. For complex issues, consult local agricultural
         "timing": action_data['timing'],
         "cost": action_data['cost'],
         "market_price": f"₹{price}/quintal",
+        "urgency": urgency,
         "message": message
     }
 
@@ -0,0 +1,135 @@
+import os
+import asyncio
+import functools
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Overall budget for one predict request, shared by all external calls
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "12"))
+
+# Upper bound per dependency; the actual timeout is also capped by what is
+# left of the request deadline
+DEPENDENCY_TIMEOUTS = {
+    "satellite": float(os.getenv("SATELLITE_TIMEOUT", "3")),
+    "voice": float(os.getenv("VOICE_TIMEOUT", "6")),
+    "whatsapp": float(os.getenv("WHATSAPP_TIMEOUT", "4")),
+}
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Same setting admission control uses to cap concurrent pipelines
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "16"))
+
+# Calls run here, off the event loop, so a hung upstream is abandoned at its
+# timeout without stalling other requests. An abandoned call keeps its thread
+# until the client's own timeout fires (Twilio: one request; gTTS: one request
+# per text chunk, each given a share of the budget by voice.py), so every
+# admitted request may briefly hold a thread per dependency. Sizing the pool
+# for that keeps calls from queueing here and eating into their timeouts.
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_IN_FLIGHT * len(DEPENDENCY_TIMEOUTS), thread_name_prefix="upstream"
+)
+
+class Deadline:
+    """Time budget for one request"""
+
+    def __init__(self, budget=REQUEST_DEADLINE):
+        self.expires = time.monotonic() + budget
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def timeout_for(self, dependency):
+        return min(DEPENDENCY_TIMEOUTS[dependency], self.remaining())
+
+class CircuitBreaker:
+    """
+    Fails fast once an upstream keeps failing
+    - closed: calls pass through, consecutive failures are counted
+    - open: calls are refused until reset_timeout has passed
+    - half-open: a single trial call decides whether to close or reopen
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self):
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self.lock:
+            return {"state": self.state, "failures": self.failures}
+
+breakers = {name: CircuitBreaker(name) for name in DEPENDENCY_TIMEOUTS}
+
+async def call_dependency(dependency, fn, deadline, *args, fallback=None, failed=None, **kwargs):
+    """
+    Call fn under the dependency's timeout and circuit breaker
+    - fn runs in a worker thread; awaiting it never blocks the event loop
+    - fn receives the timeout as a `timeout` keyword argument
+    - failed(result) lets callers treat error return values as failures
+    - On timeout, error or open circuit, returns fallback() (or None)
+
+    Returns (result, degraded)
+    """
+    breaker = breakers[dependency]
+    timeout = deadline.timeout_for(dependency)
+
+    def degrade(reason):
+        logger.warning(f"{dependency} degraded: {reason}")
+        return (fallback() if fallback else None), True
+
+    if timeout <= 0:
+        return degrade("request deadline exhausted")
+    if not breaker.allow():
+        return degrade("circuit open")
+
+    call = functools.partial(fn, *args, timeout=timeout, **kwargs)
+    try:
+        result = await asyncio.wait_for(
+            asyncio.get_running_loop().run_in_executor(_executor, call), timeout
+        )
+    except Exception as e:
+        breaker.record_failure()
+        return degrade(f"{type(e).__name__}: {e}" if str(e) else type(e).__name__)
+
+    if failed and failed(result):
+        breaker.record_failure()
+        return degrade("call reported failure")
+
+    breaker.record_success()
+    return result, False
+
+def breaker_status():
+    return {name: breaker.status() for name, breaker in breakers.items()}
@@ -4,13 +4,27 @@ from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Last successful reading per grid cell (~1 km), used when the provider is down
+GRID_RESOLUTION = 2  # decimal places of lat/lon
+_last_known = {}
+
+def _grid_cell(latitude, longitude):
+    return (round(latitude, GRID_RESOLUTION), round(longitude, GRID_RESOLUTION))
+
+def get_cached_satellite_data(latitude, longitude):
+    """Last known satellite data for the grid cell, marked stale, or None"""
+    cached = _last_known.get(_grid_cell(latitude, longitude))
+    if cached is None:
+        return None
+    return {**cached, "latitude": latitude, "longitude": longitude, "stale": True}
+
 # Google Earth Engine or other satellite API
-def get_satellite_data(latitude, longitude):
+def get_satellite_data(latitude, longitude, timeout=None):
     """
     Fetch satellite data for given coordinates
     Uses Sentinel-2 NDVI or similar
     
-    For production: Use Google Earth Engine API
+    For production: Use Google Earth Engine API (pass timeout to the client)
     For demo: Mock data
     """
     
@@ -28,7 +42,7 @@ def get_satellite_data(latitude, longitude):
     evi = round(random.uniform(0.2, 0.7), 2)  # Enhanced Vegetation Index
     moisture = round(random.uniform(0.4, 0.9), 2)
     
-    return {
+    data = {
         "latitude": latitude,
         "longitude": longitude,
         "date": datetime.now().isoformat(),
@@ -38,6 +52,9 @@ def get_satellite_data(latitude, longitude):
         "cloud_cover": round(random.uniform(0, 30), 1),
         "source": "Sentinel-2"
     }
+    
+    _last_known[_grid_cell(latitude, longitude)] = data
+    return data
 
 
 # PRODUCTION VERSION with Google Earth Engine
@@ -0,0 +1,28 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# The models module is checked in as ",odels.py"; register it under the name
+# the backend imports it by
+if "models" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "models", os.path.join(BACKEND_DIR, ",odels.py")
+    )
+    sys.modules["models"] = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(sys.modules["models"])
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Fresh database and archive directory under tmp_path"""
+    import archive
+    import models
+
+    monkeypatch.setattr(models, "DATABASE_PATH", str(tmp_path / "database.db"))
+    monkeypatch.setattr(archive, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    models.init_db()
+    return tmp_path
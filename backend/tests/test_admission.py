@@ -0,0 +1,105 @@
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+@pytest.fixture
+def controller(monkeypatch):
+    """Controller with no refill, so only the burst sizes below matter"""
+    for name, value in {
+        "MAX_IN_FLIGHT": "5",
+        "GLOBAL_RATE": "0", "GLOBAL_BURST": "100",
+        "REGION_RATE": "0", "REGION_BURST": "3",
+        "PHONE_RATE": "0", "PHONE_BURST": "1",
+        "GTTS_RATE": "0", "GTTS_BURST": "4",
+        "TWILIO_RATE": "0", "TWILIO_BURST": "4",
+    }.items():
+        monkeypatch.setenv(name, value)
+    return AdmissionController()
+
+def test_bucket_takes_until_empty():
+    bucket = TokenBucket(rate=0, capacity=2)
+    for _ in range(2):
+        assert bucket.available()
+        bucket.take()
+    assert not bucket.available()
+    assert bucket.retry_after() == 60
+
+def test_bucket_refills_up_to_capacity():
+    bucket = TokenBucket(rate=10, capacity=3)
+    bucket.tokens = 0
+    assert bucket.retry_after() == 1
+
+    bucket.updated -= 0.15
+    assert bucket.available()
+    assert 1.5 <= bucket.tokens < 3
+
+    bucket.updated -= 60
+    bucket.refill()
+    assert bucket.tokens == 3
+
+def test_bucket_reserve():
+    bucket = TokenBucket(rate=0, capacity=4)
+    bucket.tokens = 2
+    assert not bucket.available(reserve=0.5)
+    assert bucket.available(reserve=0.25)
+    assert bucket.available(reserve=0.0)
+
+def test_phone_limit_rejects_without_spending_other_buckets(controller):
+    controller.acquire("+91 98765 43210", "Cuttack")
+    controller.release()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("09876543210", "Cuttack")
+    assert rejected.value.status_code == 429
+    assert rejected.value.retry_after == 60
+    assert controller.region_buckets["Cuttack"].tokens == 2
+    assert controller.global_bucket.tokens == 99
+    assert controller.stats()["shed"] == {"rejected_phone": 1}
+
+def test_region_limit(controller):
+    for phone in ("9000000001", "9000000002", "9000000003"):
+        controller.acquire(phone, "Puri")
+        controller.release()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire("9000000004", "Puri")
+    assert rejected.value.status_code == 429
+    controller.acquire("9000000004", "Khordha")
+
+def test_in_flight_cap(controller):
+    for i in range(5):
+        controller.acquire(None, f"region-{i}")
+    assert controller.saturated()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.acquire(None, "region-5")
+    assert rejected.value.status_code == 503
+
+    controller.release()
+    controller.acquire(None, "region-5")
+    assert controller.stats()["in_flight"] == 5
+
+def test_stage_reserves_shed_low_first(controller):
+    # 4 voice tokens: LOW keeps half in reserve, MODERATE a quarter, URGENT none
+    assert controller.allow_stage("voice", "LOW")
+    assert controller.allow_stage("voice", "LOW")
+    assert not controller.allow_stage("voice", "LOW")
+    assert controller.allow_stage("voice", "MODERATE")
+    assert not controller.allow_stage("voice", "MODERATE")
+    assert controller.allow_stage("voice", "URGENT")
+    assert not controller.allow_stage("voice", "URGENT")
+
+    assert controller.stats()["shed"] == {
+        "degraded_voice_low": 1,
+        "degraded_voice_moderate": 1,
+        "degraded_voice_urgent": 1,
+    }
+    assert controller.stage_buckets["whatsapp"].tokens == 4
+
+def test_saturation_sheds_low_stages(controller):
+    for i in range(4):
+        controller.acquire(None, f"region-{i}")
+
+    assert not controller.allow_stage("whatsapp", "LOW")
+    assert controller.allow_stage("whatsapp", "MODERATE")
+    assert controller.stats()["shed"] == {"degraded_whatsapp_low": 1}
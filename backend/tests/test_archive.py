@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+import archive
+import models
+
+NOW = datetime.now().isoformat()
+
+def insert(timestamp, farmer_id=None, region="Cuttack"):
+    with models.get_db() as conn:
+        cursor = conn.execute("""
+            INSERT INTO predictions (timestamp, farmer_id, farmer_name, region, crop_type)
+            VALUES (?, ?, 'Ram Das', ?, 'Rice')
+        """, (timestamp, farmer_id, region))
+        conn.commit()
+        return cursor.lastrowid
+
+def hot_ids():
+    with models.get_db() as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM predictions ORDER BY id")]
+
+def exported_ids(**filters):
+    return [row["id"] for chunk in models.iter_predictions(**filters) for row in chunk]
+
+def copy_back_to_hot(key, row_id):
+    """Recreate the state between rollover's archive commit and its hot delete"""
+    with models.get_db() as conn:
+        with archive.attach_partition(conn, key, writable=True) as schema:
+            conn.execute(
+                f"INSERT INTO main.predictions SELECT * FROM {schema}.predictions WHERE id = ?",
+                (row_id,)
+            )
+            conn.commit()
+
+def test_rollover_moves_old_months_to_partitions(database):
+    january = [insert(f"2020-01-0{day}T10:00:00") for day in (1, 2, 3)]
+    february = [insert(f"2020-02-0{day}T10:00:00") for day in (1, 2)]
+    current = insert(NOW)
+
+    moved = archive.rollover(hot_months=1, batch_size=2)
+
+    assert moved == {"2020-01": 3, "2020-02": 2}
+    assert archive.list_archived_months() == ["2020-01", "2020-02"]
+    assert hot_ids() == [current]
+    assert archive.rollover(hot_months=1) == {}
+    assert exported_ids() == january + february + [current]
+
+def test_rollover_requires_a_hot_month(database):
+    with pytest.raises(ValueError):
+        archive.rollover(hot_months=0)
+
+def test_partitions_for_range(monkeypatch):
+    monkeypatch.setattr(archive, "list_archived_months", lambda: ["2020-01", "2020-02", "2020-03"])
+
+    assert archive.partitions_for_range("2020-02-15", "2020-03") == ["2020-02"]
+    assert archive.partitions_for_range(start="2020-02") == ["2020-02", "2020-03"]
+    assert archive.partitions_for_range(end="2020-01-31") == ["2020-01"]
+
+def test_export_filters_across_partitions(database):
+    insert("2020-01-05T10:00:00", region="Puri")
+    kept = insert("2020-02-05T10:00:00", region="Cuttack")
+    insert("2020-03-05T10:00:00", region="Cuttack")
+    archive.rollover(hot_months=1)
+
+    assert exported_ids(region="Cuttack", start="2020-01", end="2020-03") == [kept]
+
+def test_export_returns_rows_mid_move_once(database):
+    ids = [insert(f"2020-01-0{day}T10:00:00") for day in (1, 2, 3)]
+    archive.rollover(hot_months=1)
+    copy_back_to_hot("2020-01", ids[1])
+
+    assert sorted(exported_ids()) == ids
+
+def test_export_survives_concurrent_rollover(database):
+    archived = [insert(f"2020-01-0{day}T10:00:00") for day in (1, 2)]
+    archive.rollover(hot_months=1)
+    late = insert("2020-01-09T10:00:00")
+    hot = [insert(f"2020-02-0{day}T10:00:00") for day in (1, 2)] + [insert(NOW)]
+
+    chunks = models.iter_predictions(chunk_size=1)
+    first = next(chunks)
+    # Moves the late January row into a partition being read, and February
+    # into a partition the export has not listed
+    archive.rollover(hot_months=1)
+    rest = [row["id"] for chunk in chunks for row in chunk]
+
+    assert sorted([first[0]["id"]] + rest) == sorted(archived + [late] + hot)
+
+def test_history_falls_back_to_partitions(database):
+    farmer_id = models.upsert_farmer("Ram Das", "9876543210", "Cuttack")
+    old = [insert(f"2020-0{month}-01T10:00:00", farmer_id) for month in (1, 2, 3)]
+    recent = insert(NOW, farmer_id)
+    insert(NOW)
+    archive.rollover(hot_months=1)
+    copy_back_to_hot("2020-03", old[2])
+
+    history = models.get_farmer_history_by_id(farmer_id)
+    assert [row["id"] for row in history] == [recent, old[2], old[1], old[0]]
+
+    history = models._recent_history("farmer_id = ?", (farmer_id,), limit=2)
+    assert [row["id"] for row in history] == [recent, old[2]]
+
+def test_reads_attach_partitions_read_only(database):
+    insert("2020-01-01T10:00:00")
+    archive.rollover(hot_months=1)
+
+    with models.get_db() as conn:
+        with archive.attach_partition(conn, "2020-01") as schema:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                conn.execute(f"DELETE FROM {schema}.predictions")
+
+        with pytest.raises(sqlite3.OperationalError):
+            with archive.attach_partition(conn, "2019-12"):
+                pass
+    assert archive.list_archived_months() == ["2020-01"]
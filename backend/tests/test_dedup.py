@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from dedup import IdempotencyConflict, RequestDeduplicator, request_fingerprint
+
+def counting(result="advice"):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return result
+
+    return compute, calls
+
+def test_concurrent_duplicates_share_one_computation():
+    dedup = RequestDeduplicator()
+    compute, calls = counting()
+
+    async def both():
+        return await asyncio.gather(dedup.run("fp", compute), dedup.run("fp", compute))
+
+    assert asyncio.run(both()) == [("advice", "computed"), ("advice", "in_flight")]
+    assert len(calls) == 1
+    assert dedup.in_flight == {}
+
+def test_completed_result_replayed_until_window_expires():
+    compute, calls = counting()
+
+    async def twice(dedup):
+        return [await dedup.run("fp", compute), await dedup.run("fp", compute)]
+
+    assert asyncio.run(twice(RequestDeduplicator())) == [
+        ("advice", "computed"), ("advice", "completed")
+    ]
+    assert asyncio.run(twice(RequestDeduplicator(window=0))) == [
+        ("advice", "computed"), ("advice", "computed")
+    ]
+    assert len(calls) == 3
+
+def test_stored_results_are_bounded():
+    dedup = RequestDeduplicator(max_results=2)
+    compute, _ = counting()
+
+    async def several():
+        for fingerprint in ("a", "b", "c"):
+            await dedup.run(fingerprint, compute)
+        await dedup.run("d", compute)
+
+    asyncio.run(several())
+    assert len(dedup.completed) == 2
+
+def test_fingerprint_dedups_across_idempotency_keys():
+    # A second tab, or an input edited and reverted, sends a fresh key
+    dedup = RequestDeduplicator()
+    compute, calls = counting()
+
+    async def run():
+        first = await dedup.run("fp", compute, idempotency_key="tab-1")
+        concurrent = await asyncio.gather(
+            dedup.run("fp2", compute, idempotency_key="tab-1b"),
+            dedup.run("fp2", compute, idempotency_key="tab-2b"),
+        )
+        second = await dedup.run("fp", compute, idempotency_key="tab-2")
+        return first, concurrent, second
+
+    first, concurrent, second = asyncio.run(run())
+    assert first == ("advice", "computed")
+    assert concurrent == [("advice", "computed"), ("advice", "in_flight")]
+    assert second == ("advice", "completed")
+    assert len(calls) == 2
+
+def test_idempotency_key_replays_and_refuses_reuse():
+    dedup = RequestDeduplicator()
+    compute, calls = counting()
+
+    async def run():
+        assert await dedup.run("fp", compute, idempotency_key="k") == ("advice", "computed")
+        assert await dedup.run("fp", compute, idempotency_key="k") == ("advice", "completed")
+        with pytest.raises(IdempotencyConflict):
+            await dedup.run("other", compute, idempotency_key="k")
+
+    asyncio.run(run())
+    assert len(calls) == 1
+
+def test_idempotency_key_reuse_refused_while_in_flight():
+    dedup = RequestDeduplicator()
+    compute, calls = counting()
+
+    async def run():
+        first = asyncio.ensure_future(dedup.run("fp", compute, idempotency_key="k"))
+        await asyncio.sleep(0)
+        with pytest.raises(IdempotencyConflict):
+            await dedup.run("other", compute, idempotency_key="k")
+        return await first
+
+    assert asyncio.run(run()) == ("advice", "computed")
+    assert len(calls) == 1
+
+def test_failures_are_shared_but_not_stored():
+    dedup = RequestDeduplicator()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("model crashed")
+
+    async def run():
+        results = await asyncio.gather(
+            dedup.run("fp", fail), dedup.run("fp", fail), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await dedup.run("fp", fail)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert not dedup.completed
+
+def test_fingerprint_normalizes_submissions():
+    base = request_fingerprint("Ram Das", "9876543210", "Rice", "Cuttack", 20.46251, 85.88301)
+
+    assert request_fingerprint(
+        " ram  das", "+91 98765 43210", "rice ", "Puri", 20.4628, 85.8826
+    ) == base
+    assert request_fingerprint("Ram Das", "9876543210", "Rice", "Cuttack", 20.47, 85.88) != base
+    assert request_fingerprint(
+        "Ram Das", "9876543210", "Rice", "Cuttack", 20.46251, 85.88301, b"image"
+    ) != base
+
+def test_fingerprint_uses_region_without_coordinates():
+    def fingerprint(region):
+        return request_fingerprint("Ram Das", "", "Rice", region, None, None)
+
+    assert fingerprint("Cuttack") == fingerprint(" cuttack")
+    assert fingerprint("Cuttack") != fingerprint("Puri")
@@ -0,0 +1,73 @@
+import json
+import os
+import random
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from districts import DistrictResolver
+
+DISTRICTS_FILE = os.path.join(BACKEND_DIR, "..", "data", "odisha_districts.geojson")
+
+def load_features():
+    with open(DISTRICTS_FILE, encoding="utf-8") as f:
+        return json.load(f)["features"]
+
+def brute_force_districts(features, latitude, longitude):
+    """Every district containing the point, by plain even-odd ray casting"""
+    found = set()
+    for feature in features:
+        geometry = feature["geometry"]
+        polygons = geometry["coordinates"]
+        if geometry["type"] == "Polygon":
+            polygons = [polygons]
+        for rings in polygons:
+            inside = False
+            for ring in rings:
+                for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+                    if (y1 > latitude) != (y2 > latitude):
+                        if longitude < (x2 - x1) * (latitude - y1) / (y2 - y1) + x1:
+                            inside = not inside
+            if inside:
+                found.add(feature["properties"]["district"])
+    return found
+
+@pytest.fixture(scope="module")
+def features():
+    return load_features()
+
+@pytest.fixture(scope="module")
+def resolver(features):
+    return DistrictResolver(features)
+
+@pytest.fixture(scope="module")
+def random_points():
+    rng = random.Random(42)
+    return [(rng.uniform(18.8, 22.2), rng.uniform(82.7, 87.7)) for _ in range(20000)]
+
+def test_resolve_matches_brute_force(resolver, features, random_points):
+    for latitude, longitude in random_points:
+        expected = brute_force_districts(features, latitude, longitude)
+        resolved = resolver.resolve(latitude, longitude)
+        if expected:
+            assert resolved in expected, (latitude, longitude)
+        else:
+            assert resolved is None, (latitude, longitude)
+
+def test_resolve_many_matches_resolve(resolver, random_points):
+    latitudes = [latitude for latitude, _ in random_points]
+    longitudes = [longitude for _, longitude in random_points]
+    batch = resolver.resolve_many(latitudes, longitudes)
+    assert list(batch) == [resolver.resolve(lat, lon) for lat, lon in random_points]
+
+def test_district_covering_cell_without_own_edge(resolver):
+    # Only Cuttack's edges cross this cell, but the point lies inside Bhadrak
+    assert resolver.resolve(20.8089, 86.1432) == "Bhadrak"
+    assert list(resolver.resolve_many([20.8089], [86.1432])) == ["Bhadrak"]
+
+def test_outside_all_districts(resolver):
+    assert resolver.resolve(28.6139, 77.2090) is None
+    assert list(resolver.resolve_many([28.6139, -90.0], [77.2090, 0.0])) == [None, None]
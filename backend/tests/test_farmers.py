@@ -0,0 +1,30 @@
+import models
+
+def test_history_by_name_survives_respelling(database):
+    farmer_id = models.upsert_farmer("Ram Das", "9876543210", "Cuttack")
+    models.save_prediction("Ram Das", "Cuttack", "Rice", 60, "BPH", "spray", farmer_id=farmer_id)
+
+    assert models.upsert_farmer("Ramdas", "+91 98765 43210", None) == farmer_id
+    models.save_prediction("Ramdas", "Cuttack", "Rice", 70, "None", "monitor", farmer_id=farmer_id)
+
+    assert models.get_farmer(farmer_id)["name"] == "Ramdas"
+    assert len(models.get_farmer_history("Ram Das")) == 2
+    assert len(models.get_farmer_history("ramdas")) == 2
+    assert len(models.get_farmer_history_by_id(farmer_id)) == 2
+
+def test_aliases_recovered_from_predictions(database):
+    # Databases from before aliases only kept the latest spelling on the farmer
+    farmer_id = models.upsert_farmer("Ramdas", "9876543210", "Cuttack")
+    models.save_prediction("Ram  Das", "Cuttack", "Rice", 60, "BPH", "spray", farmer_id=farmer_id)
+    with models.get_db() as conn:
+        conn.execute("DROP TABLE farmer_aliases")
+        conn.commit()
+
+    models.init_db()
+
+    assert len(models.get_farmer_history("Ram Das")) == 1
+
+def test_phoneless_farmers_match_by_normalized_name(database):
+    first = models.upsert_farmer("Sita  Devi", None, "Puri")
+    assert models.upsert_farmer("sita devi", "", "Puri") == first
+    assert models.upsert_farmer("Sita Devi", "9000000001", "Puri") != first
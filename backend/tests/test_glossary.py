@@ -0,0 +1,48 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from glossary import Glossary
+
+TERMS = {
+    "LOW": "L",
+    "BPH": "B",
+    "Brown": "brown",
+    "Brown Spot": "spot",
+    "Brown Plant Hopper": "hopper",
+    "Paddy": "paddy",
+    "LOW RISK": "risk",
+    "low": "little",
+}
+
+def test_longest_term_wins():
+    glossary = Glossary(TERMS)
+    assert glossary.translate("Brown Plant Hopper on Brown rice") == "hopper on brown rice"
+    assert glossary.translate("Brown Spot, Brown Plant") == "spot, brown Plant"
+
+def test_all_caps_terms_match_only_as_written():
+    glossary = Glossary(TERMS)
+    assert glossary.translate("BPH seen") == "B seen"
+    assert glossary.translate("bph seen") == "bph seen"
+    assert glossary.translate("LOW") == "L"
+
+def test_other_terms_match_in_any_case():
+    glossary = Glossary(TERMS)
+    assert glossary.translate("paddy PADDY Paddy") == "paddy paddy paddy"
+    assert glossary.translate("BROWN PLANT HOPPER") == "hopper"
+
+def test_miscased_all_caps_term_falls_back_to_shorter_term():
+    # "low risk" is too long a match for "LOW RISK" in the wrong case; "low" still applies
+    glossary = Glossary(TERMS)
+    assert glossary.translate("low risk") == "little risk"
+    assert glossary.translate("LOW RISK") == "risk"
+
+def test_terms_match_whole_words_only():
+    glossary = Glossary(TERMS)
+    assert glossary.translate("Paddyfield BPHs Lowland") == "Paddyfield BPHs Lowland"
+    assert glossary.translate("(BPH)") == "(B)"
+
+def test_empty_glossary_leaves_text_unchanged():
+    assert Glossary({}).translate("Brown Plant Hopper") == "Brown Plant Hopper"
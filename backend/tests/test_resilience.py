@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+import resilience
+from resilience import CircuitBreaker, Deadline, call_dependency
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, "breakers", {
+        name: CircuitBreaker(name, failure_threshold=2, reset_timeout=30)
+        for name in resilience.DEPENDENCY_TIMEOUTS
+    })
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("satellite", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.status() == {"state": "open", "failures": 2}
+    assert not breaker.allow()
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker("satellite", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.status() == {"state": "closed", "failures": 1}
+
+def test_half_open_trial_closes_or_reopens():
+    breaker = CircuitBreaker("voice", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    breaker.opened_at -= 31
+
+    assert breaker.allow()
+    assert breaker.state == "half-open"
+    assert not breaker.allow()  # only the single trial call passes
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    breaker.opened_at -= 31
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.status() == {"state": "closed", "failures": 0}
+
+def test_call_passes_timeout_and_returns_result():
+    def fetch(lat, timeout):
+        return {"lat": lat, "timeout": timeout}
+
+    result, degraded = asyncio.run(call_dependency("satellite", fetch, Deadline(), 20.5))
+    assert not degraded
+    assert result == {"lat": 20.5, "timeout": resilience.DEPENDENCY_TIMEOUTS["satellite"]}
+
+def test_timeout_degrades_to_fallback():
+    def hang(timeout):
+        time.sleep(0.3)
+
+    result, degraded = asyncio.run(call_dependency(
+        "satellite", hang, Deadline(budget=0.05), fallback=lambda: "cached"
+    ))
+    assert (result, degraded) == ("cached", True)
+    assert resilience.breakers["satellite"].failures == 1
+
+def test_failed_result_counts_as_failure_and_opens_circuit():
+    calls = []
+
+    def send(timeout):
+        calls.append(timeout)
+        return None
+
+    async def twice_then_once_more():
+        outcomes = []
+        for _ in range(3):
+            outcomes.append(await call_dependency(
+                "whatsapp", send, Deadline(), failed=lambda result: result is None
+            ))
+        return outcomes
+
+    outcomes = asyncio.run(twice_then_once_more())
+    assert outcomes == [(None, True)] * 3
+    assert len(calls) == 2  # the third call is refused by the open circuit
+    assert resilience.breaker_status()["whatsapp"]["state"] == "open"
+
+def test_exhausted_deadline_skips_call():
+    def never(timeout):
+        raise AssertionError("should not be called")
+
+    deadline = Deadline(budget=0)
+    result, degraded = asyncio.run(call_dependency("voice", never, deadline))
+    assert (result, degraded) == (None, True)
+    assert resilience.breakers["voice"].failures == 0
@@ -1,12 +1,30 @@
 from gtts import gTTS
 import os
+import re
+import math
 import hashlib
 from datetime import datetime
 
+from glossary import localize
+
 AUDIO_DIR = "../audio"
+TTS_TIMEOUT = 10  # seconds, used when the caller gives none
+# gTTS sends one request per clause, split at punctuation like these
+CLAUSE_BREAK = re.compile(r"[.,](?=\s)|[!?;:\n]")
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
-def generate_voice_message(recommendation_text, language="odia"):
+def estimate_tts_requests(text):
+    """
+    Roughly how many requests gTTS makes for text: one per clause, and
+    more for clauses longer than the API's character limit
+    gTTS applies its timeout to each request, so the budget is split by this
+    """
+    clauses = [clause.strip() for clause in CLAUSE_BREAK.split(text)]
+    return max(1, sum(
+        math.ceil(len(clause) / gTTS.GOOGLE_TTS_MAX_CHARS) for clause in clauses if clause
+    ))
+
+def generate_voice_message(recommendation_text, language="odia", timeout=None):
     """
     Generate voice message in Odia or English
     Uses Google Text-to-Speech
@@ -29,15 +47,22 @@ def generate_voice_message(recommendation_text, language="odia"):
     filepath = os.path.join(AUDIO_DIR, filename)
     
     try:
-        # For Odia, simplify message (gTTS Odia support limited)
+        # For Odia/Hindi, swap in glossary terms (gTTS Odia support limited)
         if language == "odia":
             # Transliterate or simplify (in production, use proper Indic TTS)
             simplified_text = simplify_for_odia(recommendation_text)
+        elif language == "hindi":
+            simplified_text = localize(recommendation_text, "hindi")
         else:
             simplified_text = recommendation_text
         
-        # Generate audio
-        tts = gTTS(text=simplified_text, lang=lang_code, slow=False)
+        # Generate audio; each chunk request gets its share of the time budget
+        tts = gTTS(
+            text=simplified_text,
+            lang=lang_code,
+            slow=False,
+            timeout=(timeout or TTS_TIMEOUT) / estimate_tts_requests(simplified_text)
+        )
         tts.save(filepath)
         
         return f"/audio/{filename}"
@@ -51,10 +76,8 @@ def simplify_for_odia(text):
     Simplify English text for Odia TTS
     In production: Translate properly using IndicTrans or similar
     """
-    # For demo: Use simple English with key Odia terms
-    simplified = text.replace("URGENT", "ଜରୁରୀ")
-    simplified = simplified.replace("Paddy", "ଧାନ")
-    return simplified
+    # For demo: Use simple English with key Odia terms from data/glossary_odia.json
+    return localize(text, "odia")
 
 
 # PRODUCTION: Use Indic TTS or Coqui
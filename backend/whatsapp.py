@@ -7,8 +7,12 @@ load_dotenv()
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_WHATSAPP_NUMBER = os.getenv("TWILIO_WHATSAPP_NUMBER", "whatsapp:+14155238886")
+TWILIO_TIMEOUT = 10  # seconds, used when the caller gives none
 
-def send_whatsapp_notification(phone, message, voice_url=None):
+def is_configured():
+    return bool(TWILIO_ACCOUNT_SID)
+
+def send_whatsapp_notification(phone, message, voice_url=None, timeout=None):
     """
     Send WhatsApp notification using Twilio
     
@@ -42,7 +46,8 @@ def send_whatsapp_notification(phone, message, voice_url=None):
         response = requests.post(
             url,
             data=data,
-            auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+            auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
+            timeout=timeout or TWILIO_TIMEOUT
         )
         
         if response.status_code == 201:
@@ -1,6 +1,8 @@
 import streamlit as st
 import requests
 import json
+import uuid
+import hashlib
 from datetime import datetime
 import pandas as pd
 
@@ -89,7 +91,8 @@ with tab1:
         phone = st.text_input("Phone Number (Optional)", placeholder="+91 9876543210")
         region = st.selectbox(
             "Select Your Region",
-            ["Cuttack", "Khurda", "Puri", "Ganjam", "Bargarh", "Sambalpur", "Balasore", "Bhadrak"]
+            ["Cuttack", "Khurda", "Puri", "Ganjam", "Bargarh", "Sambalpur", "Balasore", "Bhadrak"],
+            help="Detected automatically from the field location when it falls inside a known district"
         )
         crop_type = st.selectbox(
             "Crop Type",
@@ -128,13 +131,41 @@ with tab1:
                     'longitude': longitude
                 }
                 
+                # Reruns and repeat clicks with unchanged inputs reuse the same key,
+                # so the backend returns the first result instead of recomputing;
+                # the image counts by content, not by file name
+                submission = (
+                    tuple(data.items()),
+                    hashlib.sha256(uploaded_file.getvalue()).hexdigest() if uploaded_file else None
+                )
+                if st.session_state.get('submission') != submission:
+                    st.session_state['submission'] = submission
+                    st.session_state['idempotency_key'] = str(uuid.uuid4())
+                headers = {'Idempotency-Key': st.session_state['idempotency_key']}
+                
                 try:
-                    response = requests.post(f"{API_URL}/api/v1/predict", data=data, files=files)
+                    response = requests.post(f"{API_URL}/api/v1/predict", data=data, files=files, headers=headers)
                     result = response.json()
                     
-                    if result['status'] == 'success':
+                    if response.status_code in (429, 503):
+                        retry_after = response.headers.get('Retry-After', 'a few')
+                        st.warning(f"{result['detail']}. Please try again in {retry_after} seconds.")
+                    
+                    elif response.status_code == 422:
+                        # Start over with a fresh key on the next attempt
+                        st.session_state.pop('submission', None)
+                        detail = result.get('detail')
+                        st.error(detail if isinstance(detail, str) else "Please check the form inputs and try again.")
+                    
+                    elif result.get('status') == 'success':
                         st.success("✅ Analysis Complete!")
                         
+                        if result.get('region_source') == 'coordinates' and result['region'] != region:
+                            st.info(f"📍 Region set to {result['region']} from your field location")
+                        
+                        if result.get('farmer_id'):
+                            st.caption(f"🆔 Farmer ID: {result['farmer_id']} (use it in History to find all your records)")
+                        
                         # Display results
                         analysis = result['analysis']
                         recommendation = result['recommendation']
@@ -189,6 +220,10 @@ with tab1:
                         # Notification status
                         if result.get('notification_sent'):
                             st.success(f"✅ WhatsApp notification sent to {phone}")
+                        
+                        # Stages skipped, timed out or served from cache
+                        if result.get('degraded'):
+                            st.caption(f"Degraded (busy, slow or unavailable): {', '.join(result['degraded'])}")
                     
                     else:
                         st.error("Analysis failed. Please try again.")
@@ -200,21 +235,36 @@ with tab1:
 with tab2:
     st.subheader("📊 Farmer History")
     
-    search_name = st.text_input("Search by Farmer Name")
+    search_by = st.radio("Search by", ["Farmer ID", "Farmer Name"], horizontal=True)
+    if search_by == "Farmer ID":
+        search_id = st.number_input("Farmer ID", min_value=1, step=1,
+                                    help="Shown after each analysis; finds your records even if your name was spelled differently")
+    else:
+        search_name = st.text_input("Search by Farmer Name")
     
     if st.button("Search History"):
-        if search_name:
-            try:
+        try:
+            history = None
+            if search_by == "Farmer ID":
+                response = requests.get(f"{API_URL}/api/v1/farmers/{int(search_id)}/history")
+                if response.status_code == 404:
+                    st.info("No farmer registered with this ID")
+                else:
+                    result = response.json()
+                    farmer = result['farmer']
+                    st.caption(f"{farmer['name']} · {farmer.get('region') or 'region unknown'}")
+                    history = result['history']
+            elif search_by == "Farmer Name" and search_name:
                 response = requests.get(f"{API_URL}/api/v1/history/{search_name}")
                 history = response.json()['history']
-                
-                if history:
-                    df = pd.DataFrame(history)
-                    st.dataframe(df, use_container_width=True)
-                else:
-                    st.info("No history found for this farmer")
-            except:
-                st.error("Could not fetch history")
+            
+            if history:
+                df = pd.DataFrame(history)
+                st.dataframe(df, use_container_width=True)
+            elif history is not None:
+                st.info("No history found for this farmer")
+        except:
+            st.error("Could not fetch history")
 
 with tab3:
     st.subheader("📈 Current Market Prices")
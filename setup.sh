@@ -3,7 +3,7 @@
 echo "🌾 Setting up FarmConnect AI..."
 
 # Create directories
-mkdir -p backend frontend data audio models temp
+mkdir -p backend frontend data audio models temp archive
 
 # Install backend dependencies
 echo "📦 Installing backend dependencies..."